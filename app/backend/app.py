@@ -1,6 +1,5 @@
 import dataclasses
 import io
-import json
 import logging
 import mimetypes
 import os
@@ -8,6 +7,8 @@ import time
 from pathlib import Path
 from typing import Any, AsyncGenerator, Dict, Union, cast
 
+import httpx
+import orjson
 from azure.cognitiveservices.speech import (
     ResultReason,
     SpeechConfig,
@@ -46,9 +47,10 @@ from quart import (
     send_file,
     send_from_directory,
 )
+from quart.json.provider import DefaultJSONProvider
 from quart_cors import cors
 
-from approaches.approach import Approach
+from approaches.approach import Approach, LazyList, StreamDelta
 from approaches.chatreadretrieveread import ChatReadRetrieveReadApproach
 from approaches.chatreadretrievereadvision import ChatReadRetrieveReadVisionApproach
 from approaches.retrievethenread import RetrieveThenReadApproach
@@ -190,20 +192,25 @@ async def ask(auth_claims: Dict[str, Any]):
         return error_response(error, "/ask")
 
 
-class JSONEncoder(json.JSONEncoder):
-    def default(self, o):
-        if dataclasses.is_dataclass(o) and not isinstance(o, type):
-            return dataclasses.asdict(o)
-        return super().default(o)
+def _ndjson_default(o):
+    if isinstance(o, StreamDelta):
+        return o.to_event()
+    if isinstance(o, LazyList):
+        return o.materialize()
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
 
 
-async def format_as_ndjson(r: AsyncGenerator[dict, None]) -> AsyncGenerator[str, None]:
+async def format_as_ndjson(r: AsyncGenerator[Union[dict, StreamDelta], None]) -> AsyncGenerator[str, None]:
+    # orjson serializes in C, which matters here: the first event carries the full
+    # extra_info payload (thought steps, messages and search results)
     try:
         async for event in r:
-            yield json.dumps(event, ensure_ascii=False, cls=JSONEncoder) + "\n"
+            yield orjson.dumps(event, default=_ndjson_default).decode() + "\n"
     except Exception as error:
         logging.exception("Exception while generating response stream: %s", error)
-        yield json.dumps(error_dict(error))
+        yield orjson.dumps(error_dict(error)).decode()
 
 
 @bp.route("/chat", methods=["POST"])
@@ -587,6 +594,13 @@ async def setup_clients():
         # Wait until token is needed to fetch for the first time
         current_app.config[CONFIG_SPEECH_SERVICE_TOKEN] = None
 
+    # One pooled HTTP/2 client shared by every OpenAI client variant, so completion and
+    # embedding calls reuse warm keep-alive connections instead of re-handshaking TLS
+    openai_http_client = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+    )
+
     if OPENAI_HOST.startswith("azure"):
         if OPENAI_HOST == "azure_custom":
             current_app.logger.info("OPENAI_HOST is azure_custom, setting up Azure OpenAI custom client")
@@ -601,7 +615,10 @@ async def setup_clients():
         if api_key := os.getenv("AZURE_OPENAI_API_KEY_OVERRIDE"):
             current_app.logger.info("AZURE_OPENAI_API_KEY_OVERRIDE found, using as api_key for Azure OpenAI client")
             openai_client = AsyncAzureOpenAI(
-                api_version=AZURE_OPENAI_API_VERSION, azure_endpoint=endpoint, api_key=api_key
+                api_version=AZURE_OPENAI_API_VERSION,
+                azure_endpoint=endpoint,
+                api_key=api_key,
+                http_client=openai_http_client,
             )
         else:
             current_app.logger.info("Using Azure credential (passwordless authentication) for Azure OpenAI client")
@@ -610,12 +627,14 @@ async def setup_clients():
                 api_version=AZURE_OPENAI_API_VERSION,
                 azure_endpoint=endpoint,
                 azure_ad_token_provider=token_provider,
+                http_client=openai_http_client,
             )
     elif OPENAI_HOST == "local":
         current_app.logger.info("OPENAI_HOST is local, setting up local OpenAI client for OPENAI_BASE_URL with no key")
         openai_client = AsyncOpenAI(
             base_url=os.environ["OPENAI_BASE_URL"],
             api_key="no-key-required",
+            http_client=openai_http_client,
         )
     else:
         current_app.logger.info(
@@ -624,6 +643,7 @@ async def setup_clients():
         openai_client = AsyncOpenAI(
             api_key=OPENAI_API_KEY,
             organization=OPENAI_ORGANIZATION,
+            http_client=openai_http_client,
         )
 
     current_app.config[CONFIG_OPENAI_CLIENT] = openai_client
@@ -721,14 +741,30 @@ async def setup_clients():
 
 @bp.after_app_serving
 async def close_clients():
+    # Stop the embedding batcher's worker before its OpenAI client goes away
+    await current_app.config[CONFIG_CHAT_APPROACH].embedding_batcher.close()
+    # Closing the OpenAI client also closes the shared pooled HTTP/2 client behind it
+    await current_app.config[CONFIG_OPENAI_CLIENT].close()
     await current_app.config[CONFIG_SEARCH_CLIENT].close()
     await current_app.config[CONFIG_BLOB_CONTAINER_CLIENT].close()
     if current_app.config.get(CONFIG_USER_BLOB_CONTAINER_CLIENT):
         await current_app.config[CONFIG_USER_BLOB_CONTAINER_CLIENT].close()
 
 
+class _AppJSONProvider(DefaultJSONProvider):
+    """Extends the default provider so jsonify can resolve lazily built thought-step
+    payloads at encode time."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, LazyList):
+            return o.materialize()
+        return DefaultJSONProvider.default(o)
+
+
 def create_app():
     app = Quart(__name__)
+    app.json = _AppJSONProvider(app)
     app.register_blueprint(bp)
     app.register_blueprint(chat_history_cosmosdb_bp)
 
@@ -0,0 +1,52 @@
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Any, Mapping, Optional, Sequence
+
+import orjson
+
+
+class AnswerCache:
+    """
+    In-memory LRU cache of final answer texts, so repeated questions that retrieve the
+    same documents skip the answer-generation completion entirely (cache-augmented
+    generation). Keys hash the exact messages sent to the model — the system prompt,
+    the trimmed history and the user question with its retrieved sources — plus the
+    model and sampling settings, so a hit is only served when the completion request
+    would be byte-for-byte identical. All access is guarded by an asyncio.Lock.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def build_key(
+        messages: Sequence[Mapping[str, Any]],
+        model: str,
+        temperature: float,
+        seed: Optional[int],
+    ) -> str:
+        # Hashing the built messages rather than reconstructing their inputs piecemeal
+        # means everything the model sees — instructions, history, the current question
+        # and the sources text — is covered by construction, with no input left behind
+        hasher = hashlib.sha256("|".join([model, str(temperature), str(seed)]).encode("utf-8"))
+        hasher.update(orjson.dumps(list(messages)))
+        return hasher.hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        async with self._lock:
+            answer = self._entries.get(key)
+            if answer is not None:
+                self._entries.move_to_end(key)
+            return answer
+
+    async def put(self, key: str, answer: str) -> None:
+        async with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+            self._entries[key] = answer
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
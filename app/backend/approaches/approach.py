@@ -1,14 +1,17 @@
 import os
 from abc import ABC
 from dataclasses import dataclass
+from types import MappingProxyType
 from typing import (
     Any,
     AsyncGenerator,
     Awaitable,
     Callable,
     List,
+    Mapping,
     Optional,
     TypedDict,
+    Union,
     cast,
 )
 from urllib.parse import urljoin
@@ -27,6 +30,10 @@ from openai.types.chat import ChatCompletionMessageParam
 from core.authentication import AuthenticationHelper
 from text import nonewlines
 
+# Shared immutable default for the optional request context, so call sites neither
+# allocate a fresh dict per request nor share a mutable one across calls
+EMPTY_CONTEXT: Mapping[str, Any] = MappingProxyType({})
+
 
 @dataclass
 class Document:
@@ -83,14 +90,77 @@ class Document:
         return None
 
 
+class LazyList:
+    """A sequence built from a factory on first access. Thought-step payloads such as
+    serialized search results are only read when the response is JSON-encoded, so
+    deferring the materialization keeps the per-result dict building out of the
+    request's critical path (and skips it entirely if the payload is never read)."""
+
+    __slots__ = ("_factory", "_items")
+
+    def __init__(self, factory: Callable[[], List[Any]]):
+        self._factory = factory
+        self._items: Optional[List[Any]] = None
+
+    def materialize(self) -> List[Any]:
+        if self._items is None:
+            self._items = self._factory()
+        return self._items
+
+    def __iter__(self):
+        return iter(self.materialize())
+
+    def __len__(self) -> int:
+        return len(self.materialize())
+
+    def __getitem__(self, index):
+        return self.materialize()[index]
+
+
+# Slotted to keep the several-per-request allocations off the GC-tracked dict heap;
+# slots cannot coexist with a field default before Python 3.10, so callers without
+# props pass None explicitly
 @dataclass
 class ThoughtStep:
+    __slots__ = ("title", "description", "props")
+
     title: str
     description: Optional[Any]
-    props: Optional[dict[str, Any]] = None
+    props: Optional[dict[str, Any]]
+
+
+class StreamDelta:
+    """A single streamed completion delta. Uses __slots__ (rather than a dataclass, which
+    cannot combine slots with defaults before Python 3.10) so the per-token events carry no
+    instance dict; the transport serializes them into the {"delta": ...} wire shape."""
+
+    __slots__ = ("role", "content")
+
+    def __init__(self, role: Optional[str] = None, content: Optional[str] = None):
+        self.role = role
+        self.content = content
+
+    def to_event(self) -> dict[str, Any]:
+        return {"delta": {"content": self.content, "role": self.role}}
 
 
 class Approach(ABC):
+    # Slots for every attribute this base assigns, so slotted subclasses are not
+    # handed a __dict__ by this base; subclasses without __slots__ of their own
+    # still get one as usual
+    __slots__ = (
+        "search_client",
+        "openai_client",
+        "auth_helper",
+        "query_language",
+        "query_speller",
+        "embedding_deployment",
+        "embedding_model",
+        "embedding_dimensions",
+        "openai_host",
+        "vision_endpoint",
+        "vision_token_provider",
+    )
 
     # Allows usage of non-GPT model even if no tokenizer is available for accurate token counting
     # Useful for using local small language models, for example
@@ -231,6 +301,11 @@ class Approach(ABC):
             return sourcepage
 
     async def compute_text_embedding(self, q: str):
+        return (await self.compute_text_embeddings([q]))[0]
+
+    async def compute_text_embeddings(self, queries: List[str]) -> List[VectorizedQuery]:
+        """Embeds several texts in a single embeddings call; the endpoint accepts list
+        input natively, so batching costs one round-trip regardless of batch size."""
         SUPPORTED_DIMENSIONS_MODEL = {
             "text-embedding-ada-002": False,
             "text-embedding-3-small": True,
@@ -246,11 +321,13 @@ class Approach(ABC):
         embedding = await self.openai_client.embeddings.create(
             # Azure OpenAI takes the deployment name as the model name
             model=self.embedding_deployment if self.embedding_deployment else self.embedding_model,
-            input=q,
+            input=queries,
             **dimensions_args,
         )
-        query_vector = embedding.data[0].embedding
-        return VectorizedQuery(vector=query_vector, k_nearest_neighbors=50, fields="embedding")
+        return [
+            VectorizedQuery(vector=data.embedding, k_nearest_neighbors=50, fields="embedding")
+            for data in embedding.data
+        ]
 
     async def compute_image_embedding(self, q: str):
         endpoint = urljoin(self.vision_endpoint, "computervision/retrieval:vectorizeText")
@@ -272,7 +349,7 @@ class Approach(ABC):
         self,
         messages: list[ChatCompletionMessageParam],
         session_state: Any = None,
-        context: dict[str, Any] = {},
+        context: Mapping[str, Any] = EMPTY_CONTEXT,
     ) -> dict[str, Any]:
         raise NotImplementedError
 
@@ -280,6 +357,6 @@ class Approach(ABC):
         self,
         messages: list[ChatCompletionMessageParam],
         session_state: Any = None,
-        context: dict[str, Any] = {},
-    ) -> AsyncGenerator[dict[str, Any], None]:
+        context: Mapping[str, Any] = EMPTY_CONTEXT,
+    ) -> AsyncGenerator[Union[dict[str, Any], StreamDelta], None]:
         raise NotImplementedError
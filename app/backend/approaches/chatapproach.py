@@ -1,24 +1,19 @@
-import json
-import re
+import asyncio
+import functools
 from abc import ABC, abstractmethod
-from typing import Any, AsyncGenerator, Optional
+from typing import Any, AsyncGenerator, Final, Mapping, Optional, Union
 
+import orjson
 from openai.types.chat import ChatCompletion, ChatCompletionMessageParam
 
-from approaches.approach import Approach
+from approaches.approach import EMPTY_CONTEXT, Approach, StreamDelta
+from approaches.fewshots import FewShotSelector
 
-
-class ChatApproach(Approach, ABC):
-    query_prompt_few_shots: list[ChatCompletionMessageParam] = [
-        {"role": "user", "content": "Tell me more about the Ignite 2024"},
-        {"role": "assistant", "content": "Summarize the event topics"},
-        {"role": "user", "content": "What is the new in AI?"},
-        {"role": "assistant", "content": "Look for content related to AI"},
-    ]
-    NO_RESPONSE = "0"
-
-   
-    query_prompt_template = """You are a content retrieval assistant tasked with finding information specifically related to the Microsoft Ignite 2024 event using the provided index data. Do not answer or respond to queries that are outside the defined scope of Microsoft Ignite 2024.
+# Module-level constant so the multi-KB literal is compiled once at import and shared
+# by every ChatApproach subclass instead of being re-bound per class body.
+_QUERY_PROMPT_TEMPLATE: Final[
+    str
+] = """You are a content retrieval assistant tasked with finding information specifically related to the Microsoft Ignite 2024 event using the provided index data. Do not answer or respond to queries that are outside the defined scope of Microsoft Ignite 2024.
 
 # Instructions
 
@@ -76,7 +71,73 @@ class ChatApproach(Approach, ABC):
 - If the query is unrelated or too ambiguous, use the out-of-scope response template.  
 - Handle edge cases by erring on the side of caution and avoiding extrapolation beyond the dataset.
    
-    """
+"""
+
+
+def _scan_followup_questions(content: str) -> "tuple[str, list[str]]":
+    """Single pass over the content: returns the text before the first '<<' marker and every
+    '<<...>>'-delimited question. Replaces the previous regex (whose [^>>] class was really
+    just [^>]) with plain str.find calls, O(n) with no regex state machine. str.find is a
+    C-level substring scan, so fixed-delimiter matching needs no regex/DFA library even on
+    large concatenated stream buffers."""
+    first = content.find("<<")
+    if first == -1:
+        return content, []
+    questions: list[str] = []
+    start = first
+    while start != -1:
+        end = content.find(">>", start + 2)
+        if end == -1:
+            break
+        if end > start + 2:
+            questions.append(content[start + 2 : end])
+        start = content.find("<<", end + 2)
+    return content[:first], questions
+
+
+@functools.lru_cache(maxsize=16)
+def _build_default_system_prompt(static_prefix: str, follow_up_questions_prompt: str) -> str:
+    """Specialized builder for the common no-override path: a straight concatenation,
+    memoized per (prefix, follow-up prompt) pair so production requests hit the cache."""
+    return static_prefix + follow_up_questions_prompt
+
+
+@functools.lru_cache(maxsize=128)
+def _build_override_system_prompt(static_prefix: str, override_prompt: str, follow_up_questions_prompt: str) -> str:
+    """Builder for client-supplied prompt overrides, keeping the static prefix first so the
+    provider's automatic prompt-prefix caching can reuse it across requests."""
+    if override_prompt.startswith(">>>"):
+        return static_prefix + override_prompt[3:] + "\n" + follow_up_questions_prompt
+    else:
+        return override_prompt.format(follow_up_questions_prompt=follow_up_questions_prompt)
+
+
+class ChatApproach(Approach, ABC):
+    # Keep the hierarchy __dict__-free for slotted subclasses; everything below is a
+    # class attribute, so no slots are needed here
+    __slots__ = ()
+
+    query_prompt_few_shots: list[ChatCompletionMessageParam] = [
+        {"role": "user", "content": "Tell me more about the Ignite 2024"},
+        {"role": "assistant", "content": "Summarize the event topics"},
+        {"role": "user", "content": "What is the new in AI?"},
+        {"role": "assistant", "content": "Look for content related to AI"},
+    ]
+    NO_RESPONSE = "0"
+
+    follow_up_questions_prompt_content = """Generate 3 very brief follow-up questions that the user would likely ask next.
+    Enclose the follow-up questions in double angle brackets. Example:
+    <<What sessions cover this topic?>>
+    <<Where can I find the announcement link?>>
+    <<Is there a recording available?>>
+    Do no repeat questions that have already been asked.
+    Make sure the last question ends with ">>"."""
+
+    # When set, few-shot examples for the query-generation prompt are picked per query
+    # by embedding similarity instead of using the static query_prompt_few_shots
+    few_shot_selector: Optional[FewShotSelector] = None
+
+    query_prompt_template = _QUERY_PROMPT_TEMPLATE
 
     @property
     @abstractmethod
@@ -88,30 +149,37 @@ class ChatApproach(Approach, ABC):
         pass
 
     def get_system_prompt(self, override_prompt: Optional[str], follow_up_questions_prompt: str) -> str:
+        # Dispatch once on the rare override path so the default path is a single
+        # memoized, branch-free call
+        prefix = self.system_message_chat_conversation
         if override_prompt is None:
-            return self.system_message_chat_conversation.format(
-                injected_prompt="", follow_up_questions_prompt=follow_up_questions_prompt
-            )
-        elif override_prompt.startswith(">>>"):
-            return self.system_message_chat_conversation.format(
-                injected_prompt=override_prompt[3:] + "\n", follow_up_questions_prompt=follow_up_questions_prompt
-            )
-        else:
-            return override_prompt.format(follow_up_questions_prompt=follow_up_questions_prompt)
+            return _build_default_system_prompt(prefix, follow_up_questions_prompt)
+        return _build_override_system_prompt(prefix, override_prompt, follow_up_questions_prompt)
+
+    async def get_query_prompt_few_shots(self, user_query: str) -> list[ChatCompletionMessageParam]:
+        """Returns the few-shot examples for the query-generation prompt, selecting the most
+        relevant ones from the configured pool, or the static examples when no pool is set."""
+        if self.few_shot_selector is None:
+            return self.query_prompt_few_shots
+        query_vector = (await self.compute_text_embedding(user_query)).vector
+        return self.few_shot_selector.select(query_vector)
 
     def get_search_query(self, chat_completion: ChatCompletion, user_query: str):
         response_message = chat_completion.choices[0].message
 
         if response_message.tool_calls:
-            for tool in response_message.tool_calls:
-                if tool.type != "function":
-                    continue
-                function = tool.function
-                if function.name == "search_sources":
-                    arg = json.loads(function.arguments)
-                    search_query = arg.get("search_query", self.NO_RESPONSE)
-                    if search_query != self.NO_RESPONSE:
-                        return search_query
+            function = next(
+                (
+                    tool.function
+                    for tool in response_message.tool_calls
+                    if tool.type == "function" and tool.function.name == "search_sources"
+                ),
+                None,
+            )
+            if function:
+                search_query = orjson.loads(function.arguments).get("search_query", self.NO_RESPONSE)
+                if search_query != self.NO_RESPONSE:
+                    return search_query
         elif query_text := response_message.content:
             if query_text.strip() != self.NO_RESPONSE:
                 return query_text
@@ -120,13 +188,13 @@ class ChatApproach(Approach, ABC):
     def extract_followup_questions(self, content: Optional[str]):
         if content is None:
             return content, []
-        return content.split("<<")[0], re.findall(r"<<([^>>]+)>>", content)
+        return _scan_followup_questions(content)
 
     async def run_without_streaming(
         self,
         messages: list[ChatCompletionMessageParam],
-        overrides: dict[str, Any],
-        auth_claims: dict[str, Any],
+        overrides: Mapping[str, Any],
+        auth_claims: Mapping[str, Any],
         session_state: Any = None,
     ) -> dict[str, Any]:
         extra_info, chat_coroutine = await self.run_until_final_call(
@@ -148,61 +216,82 @@ class ChatApproach(Approach, ABC):
     async def run_with_streaming(
         self,
         messages: list[ChatCompletionMessageParam],
-        overrides: dict[str, Any],
-        auth_claims: dict[str, Any],
+        overrides: Mapping[str, Any],
+        auth_claims: Mapping[str, Any],
         session_state: Any = None,
-    ) -> AsyncGenerator[dict, None]:
+    ) -> AsyncGenerator[Union[dict[str, Any], StreamDelta], None]:
         extra_info, chat_coroutine = await self.run_until_final_call(
             messages, overrides, auth_claims, should_stream=True
         )
         yield {"delta": {"role": "assistant"}, "context": extra_info, "session_state": session_state}
 
+        suggest_followups = bool(overrides.get("suggest_followup_questions"))
         followup_questions_started = False
-        followup_content = ""
+        followup_parts: list[str] = []
+        role_emitted = False
         async for event_chunk in await chat_coroutine:
             # "2023-07-01-preview" API version has a bug where first response has empty choices
-            event = event_chunk.model_dump()  # Convert pydantic model to dict
-            if event["choices"]:
-                completion = {
-                    "delta": {
-                        "content": event["choices"][0]["delta"].get("content"),
-                        "role": event["choices"][0]["delta"]["role"],
-                    }
-                }
-                # if event contains << and not >>, it is start of follow-up question, truncate
-                content = completion["delta"].get("content")
-                content = content or ""  # content may either not exist in delta, or explicitly be None
-                if overrides.get("suggest_followup_questions") and "<<" in content:
-                    followup_questions_started = True
-                    earlier_content = content[: content.index("<<")]
-                    if earlier_content:
-                        completion["delta"]["content"] = earlier_content
-                        yield completion
-                    followup_content += content[content.index("<<") :]
-                elif followup_questions_started:
-                    followup_content += content
-                else:
-                    yield completion
-        if followup_content:
-            _, followup_questions = self.extract_followup_questions(followup_content)
+            if not event_chunk.choices:
+                continue
+            # Read fields straight off the pydantic model rather than model_dump(),
+            # which walks the full schema and allocates a dict per streamed chunk
+            delta = event_chunk.choices[0].delta
+            content = delta.content  # content may be absent or explicitly None
+            if not content:
+                # Role-only and keep-alive chunks carry no text; emit the role once
+                # and skip building a completion dict for them
+                if delta.role and not role_emitted:
+                    role_emitted = True
+                    yield StreamDelta(role=delta.role)
+                continue
+            # if event contains << and not >>, it is start of follow-up question, truncate
+            pre_content, sep, post_content = content.partition("<<")
+            if sep and suggest_followups:
+                followup_questions_started = True
+                if pre_content:
+                    yield StreamDelta(role=delta.role, content=pre_content)
+                followup_parts.append(sep + post_content)
+            elif followup_questions_started:
+                followup_parts.append(content)
+            else:
+                yield StreamDelta(role=delta.role, content=content)
+        if followup_parts:
+            _, followup_questions = self.extract_followup_questions("".join(followup_parts))
             yield {"delta": {"role": "assistant"}, "context": {"followup_questions": followup_questions}}
 
     async def run(
         self,
         messages: list[ChatCompletionMessageParam],
         session_state: Any = None,
-        context: dict[str, Any] = {},
+        context: Mapping[str, Any] = EMPTY_CONTEXT,
     ) -> dict[str, Any]:
-        overrides = context.get("overrides", {})
-        auth_claims = context.get("auth_claims", {})
+        overrides = context.get("overrides") or EMPTY_CONTEXT
+        auth_claims = context.get("auth_claims") or EMPTY_CONTEXT
         return await self.run_without_streaming(messages, overrides, auth_claims, session_state)
 
+    async def run_many(
+        self,
+        batches: list[list[ChatCompletionMessageParam]],
+        session_state: Any = None,
+        context: Mapping[str, Any] = EMPTY_CONTEXT,
+        max_concurrency: int = 10,
+    ) -> list[dict[str, Any]]:
+        """Runs several independent chat conversations concurrently, bounded by a semaphore
+        so a large batch cannot exhaust connections or provider rate limits."""
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run_one(messages: list[ChatCompletionMessageParam]) -> dict[str, Any]:
+            async with semaphore:
+                return await self.run(messages, session_state=session_state, context=context)
+
+        return await asyncio.gather(*(run_one(messages) for messages in batches))
+
     async def run_stream(
         self,
         messages: list[ChatCompletionMessageParam],
         session_state: Any = None,
-        context: dict[str, Any] = {},
-    ) -> AsyncGenerator[dict[str, Any], None]:
-        overrides = context.get("overrides", {})
-        auth_claims = context.get("auth_claims", {})
+        context: Mapping[str, Any] = EMPTY_CONTEXT,
+    ) -> AsyncGenerator[Union[dict[str, Any], StreamDelta], None]:
+        overrides = context.get("overrides") or EMPTY_CONTEXT
+        auth_claims = context.get("auth_claims") or EMPTY_CONTEXT
         return self.run_with_streaming(messages, overrides, auth_claims, session_state)
@@ -1,20 +1,78 @@
-from typing import Any, Coroutine, List, Literal, Optional, Union, overload
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    AsyncGenerator,
+    Awaitable,
+    Final,
+    List,
+    Literal,
+    Optional,
+    Union,
+    overload,
+)
 
 from azure.search.documents.aio import SearchClient
 from azure.search.documents.models import VectorQuery
-from openai import AsyncOpenAI, AsyncStream
+from openai import AsyncOpenAI
 from openai.types.chat import (
     ChatCompletion,
     ChatCompletionChunk,
+    ChatCompletionMessage,
     ChatCompletionMessageParam,
     ChatCompletionToolParam,
 )
+from openai.types.chat.chat_completion import Choice
 from openai_messages_token_helper import build_messages, get_token_limit
 
-from approaches.approach import ThoughtStep
+from approaches.answercache import AnswerCache
+from approaches.approach import LazyList, ThoughtStep
 from approaches.chatapproach import ChatApproach
+from approaches.embeddingbatcher import EmbeddingBatcher
+from approaches.embeddingcache import EmbeddingCache
 from core.authentication import AuthenticationHelper
 
+# Frozen at import: static only, since the injected prompt and follow-up questions
+# prompt are appended after this prefix by get_system_prompt, never interpolated into it
+_SYSTEM_MESSAGE_TEMPLATE: Final[str] = """
+        """
+
+# build_messages runs a synchronous tiktoken BPE pass over the full prompt and history,
+# which would otherwise block the event loop for milliseconds per request; a dedicated
+# pool keeps it off the loop without contending with the default executor
+_MESSAGE_BUILD_EXECUTOR: Final = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="build_messages")
+
+# The tool schema never varies per request, so build the dict/list tree once at import
+_TOOLS: Final[List[ChatCompletionToolParam]] = [
+    {
+        "type": "function",
+        "function": {
+            "name": "search_sources",
+            "description": "Retrieve sources from the Azure AI Search index",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "search_query": {
+                        "type": "string",
+                        "description": "Query string to retrieve documents from azure search eg: 'Health care plan'",
+                    }
+                },
+                "required": ["search_query"],
+            },
+        },
+    }
+]
+
+
+def _discard_task(task: "asyncio.Task") -> None:
+    """Cancels a speculative task whose result is no longer wanted and retrieves its
+    exception once done: cancel() is a no-op on a task that has already failed, and an
+    unretrieved exception makes the loop log "Task exception was never retrieved"."""
+    task.cancel()
+    task.add_done_callback(lambda done: None if done.cancelled() else done.exception())
+
 
 class ChatReadRetrieveReadApproach(ChatApproach):
     """
@@ -23,6 +81,35 @@ class ChatReadRetrieveReadApproach(ChatApproach):
     original user question, and search results to OpenAI to generate a response.
     """
 
+    # One instance serves every request, but slots also buy faster attribute access on
+    # the hot path (fixed offset instead of a dict lookup); the whole MRO declares
+    # __slots__ so instances carry no __dict__. Shared attributes live in
+    # Approach.__slots__; few_shot_selector needs an instance slot (assigned by the
+    # app at startup when the selector is configured) since closed slots would
+    # otherwise make the ChatApproach class attribute read-only per instance
+    __slots__ = (
+        "chatgpt_model",
+        "chatgpt_deployment",
+        "sourcepage_field",
+        "content_field",
+        "chatgpt_token_limit",
+        "few_shot_selector",
+        "embedding_cache",
+        "embedding_batcher",
+        "answer_cache",
+        "_effective_model",
+        "_query_prompt_budget",
+        "_answer_prompt_budget",
+        "_build_query_messages",
+        "_model_info",
+        "_chat_create",
+    )
+
+    # Completion budgets for the two LLM calls; the prompt-side budgets derived from
+    # them are precomputed per instance in __init__
+    QUERY_RESPONSE_TOKEN_LIMIT = 100
+    RESPONSE_TOKEN_LIMIT = 1024
+
     def __init__(
         self,
         *,
@@ -52,13 +139,108 @@ class ChatReadRetrieveReadApproach(ChatApproach):
         self.query_language = query_language
         self.query_speller = query_speller
         self.chatgpt_token_limit = get_token_limit(chatgpt_model, default_to_minimum=self.ALLOW_NON_GPT_MODELS)
+        # Slot shadows the ChatApproach class attribute, so the default is set here
+        self.few_shot_selector = None
+        self.embedding_cache = EmbeddingCache()
+        self.embedding_batcher = EmbeddingBatcher(super().compute_text_embeddings)
+        self.answer_cache = AnswerCache()
+        # Azure OpenAI takes the deployment name as the model name; resolved once here
+        # instead of a ternary at every completion call
+        self._effective_model = chatgpt_deployment or chatgpt_model
+        self._query_prompt_budget = self.chatgpt_token_limit - self.QUERY_RESPONSE_TOKEN_LIMIT
+        self._answer_prompt_budget = self.chatgpt_token_limit - self.RESPONSE_TOKEN_LIMIT
+        # The query-generation prompt prefix (model, system template, tool schema and
+        # token budget) never varies per request; bind it once so each call only supplies
+        # the few-shots, history and user question
+        self._build_query_messages = functools.partial(
+            build_messages,
+            model=chatgpt_model,
+            system_prompt=self.query_prompt_template,
+            tools=_TOOLS,
+            max_tokens=self._query_prompt_budget,
+            fallback_to_default=self.ALLOW_NON_GPT_MODELS,
+        )
+        # Bound method for chat.completions.create, resolved lazily on first request
+        # rather than here so a create method swapped in after construction (as the
+        # test fixtures do) is still honored; saves the three-attribute chain walk on
+        # the two completion calls every request makes
+        self._chat_create: Optional[Any] = None
+        # Reused by every ThoughtStep instead of rebuilding the same dict per request
+        self._model_info = (
+            {"model": chatgpt_model, "deployment": chatgpt_deployment}
+            if chatgpt_deployment
+            else {"model": chatgpt_model}
+        )
 
-    @property
-    def system_message_chat_conversation(self):
-        return """
-        {follow_up_questions_prompt}
-        {injected_prompt}
-        """
+    async def compute_text_embedding(self, q: str):
+        # Repeat and near-duplicate questions are common in chat; serving their vectors
+        # from the LRU cache skips an embeddings round-trip to OpenAI
+        cached = await self.embedding_cache.get(q)
+        if cached is not None:
+            return cached
+        # Cache misses go through the batcher, which coalesces concurrent requests
+        # into a single list-input embeddings call
+        vector_query = await self.embedding_batcher.submit(q)
+        await self.embedding_cache.put(q, vector_query)
+        return vector_query
+
+    # Plain class attribute rather than a property: the value is a constant, so there is
+    # no reason to run a descriptor on every access
+    system_message_chat_conversation = _SYSTEM_MESSAGE_TEMPLATE
+
+    async def _replay_cached_answer(
+        self, answer: str, should_stream: bool
+    ) -> Union[ChatCompletion, AsyncGenerator[ChatCompletionChunk, None]]:
+        """Rebuilds a completion (or a two-chunk stream) from a cached answer text, shaped
+        like the client responses so the downstream streaming/non-streaming code is unchanged."""
+        model = self._effective_model
+        if not should_stream:
+            return ChatCompletion(
+                object="chat.completion",
+                choices=[
+                    Choice(
+                        message=ChatCompletionMessage(role="assistant", content=answer), finish_reason="stop", index=0
+                    )
+                ],
+                id="cached-answer",
+                created=0,
+                model=model,
+            )
+
+        async def replay_chunks() -> AsyncGenerator[ChatCompletionChunk, None]:
+            for delta in [{"role": "assistant"}, {"content": answer}]:
+                yield ChatCompletionChunk.model_validate(
+                    {
+                        "object": "chat.completion.chunk",
+                        "choices": [{"delta": delta, "index": 0, "finish_reason": None}],
+                        "id": "cached-answer",
+                        "created": 0,
+                        "model": model,
+                    }
+                )
+
+        return replay_chunks()
+
+    async def _capture_answer(self, cache_key: str, chat_coroutine, should_stream: bool):
+        """Awaits the real completion and tees the answer text into the cache; for streams,
+        content is accumulated while chunks pass through untouched."""
+        response = await chat_coroutine
+        if not should_stream:
+            content = response.choices[0].message.content
+            if content:
+                await self.answer_cache.put(cache_key, content)
+            return response
+
+        async def tee_chunks() -> AsyncGenerator[ChatCompletionChunk, None]:
+            parts: list[str] = []
+            async for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                yield chunk
+            if parts:
+                await self.answer_cache.put(cache_key, "".join(parts))
+
+        return tee_chunks()
 
     @overload
     async def run_until_final_call(
@@ -67,7 +249,7 @@ class ChatReadRetrieveReadApproach(ChatApproach):
         overrides: dict[str, Any],
         auth_claims: dict[str, Any],
         should_stream: Literal[False],
-    ) -> tuple[dict[str, Any], Coroutine[Any, Any, ChatCompletion]]: ...
+    ) -> tuple[dict[str, Any], Awaitable[ChatCompletion]]: ...
 
     @overload
     async def run_until_final_call(
@@ -76,7 +258,7 @@ class ChatReadRetrieveReadApproach(ChatApproach):
         overrides: dict[str, Any],
         auth_claims: dict[str, Any],
         should_stream: Literal[True],
-    ) -> tuple[dict[str, Any], Coroutine[Any, Any, AsyncStream[ChatCompletionChunk]]]: ...
+    ) -> tuple[dict[str, Any], Awaitable[AsyncGenerator[ChatCompletionChunk, None]]]: ...
 
     async def run_until_final_call(
         self,
@@ -84,12 +266,12 @@ class ChatReadRetrieveReadApproach(ChatApproach):
         overrides: dict[str, Any],
         auth_claims: dict[str, Any],
         should_stream: bool = False,
-    ) -> tuple[dict[str, Any], Coroutine[Any, Any, Union[ChatCompletion, AsyncStream[ChatCompletionChunk]]]]:
+    ) -> tuple[dict[str, Any], Awaitable[Union[ChatCompletion, AsyncGenerator[ChatCompletionChunk, None]]]]:
         seed = overrides.get("seed", None)
         use_text_search = overrides.get("retrieval_mode") in ["text", "hybrid", None]
         use_vector_search = overrides.get("retrieval_mode") in ["vectors", "hybrid", None]
-        use_semantic_ranker = True if overrides.get("semantic_ranker") else False
-        use_semantic_captions = True if overrides.get("semantic_captions") else False
+        use_semantic_ranker = bool(overrides.get("semantic_ranker"))
+        use_semantic_captions = bool(overrides.get("semantic_captions"))
         top = overrides.get("top", 3)
         minimum_search_score = overrides.get("minimum_search_score", 0.0)
         minimum_reranker_score = overrides.get("minimum_reranker_score", 0.0)
@@ -98,60 +280,83 @@ class ChatReadRetrieveReadApproach(ChatApproach):
         original_user_query = messages[-1]["content"]
         if not isinstance(original_user_query, str):
             raise ValueError("The most recent message content must be a string.")
+        chat_create = self._chat_create
+        if chat_create is None:
+            chat_create = self._chat_create = self.openai_client.chat.completions.create
         user_query_request = "Generate search query for: " + original_user_query
-
-        tools: List[ChatCompletionToolParam] = [
-            {
-                "type": "function",
-                "function": {
-                    "name": "search_sources",
-                    "description": "Retrieve sources from the Azure AI Search index",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "search_query": {
-                                "type": "string",
-                                "description": "Query string to retrieve documents from azure search eg: 'Health care plan'",
-                            }
-                        },
-                        "required": ["search_query"],
-                    },
-                },
-            }
-        ]
+        # Sliced once and shared by both build_messages calls below
+        past_messages = messages[:-1]
 
         # STEP 1: Generate an optimized keyword search query based on the chat history and the last question
-        query_response_token_limit = 100
-        query_messages = build_messages(
-            model=self.chatgpt_model,
-            system_prompt=self.query_prompt_template,
-            tools=tools,
-            few_shots=self.query_prompt_few_shots,
-            past_messages=messages[:-1],
-            new_user_content=user_query_request,
-            max_tokens=self.chatgpt_token_limit - query_response_token_limit,
-            fallback_to_default=self.ALLOW_NON_GPT_MODELS,
-        )
+        embed_task: Optional[asyncio.Task] = None
+        query_messages: Optional[list[ChatCompletionMessageParam]] = None
+        if len(messages) == 1 and not overrides.get("force_query_rewrite"):
+            # Single-turn: with no history to fold in, the rewrite almost always returns
+            # the question verbatim, so skip the round-trip and search on it directly
+            query_text = original_user_query
+            if use_vector_search:
+                embed_task = asyncio.create_task(self.compute_text_embedding(original_user_query))
+        else:
+            query_messages = await asyncio.get_running_loop().run_in_executor(
+                _MESSAGE_BUILD_EXECUTOR,
+                functools.partial(
+                    self._build_query_messages,
+                    few_shots=await self.get_query_prompt_few_shots(original_user_query),
+                    past_messages=past_messages,
+                    new_user_content=user_query_request,
+                ),
+            )
 
-        chat_completion: ChatCompletion = await self.openai_client.chat.completions.create(
-            messages=query_messages,  # type: ignore
-            # Azure OpenAI takes the deployment name as the model name
-            model=self.chatgpt_deployment if self.chatgpt_deployment else self.chatgpt_model,
-            temperature=0.0,  # Minimize creativity for search query generation
-            max_tokens=query_response_token_limit,  # Setting too low risks malformed JSON, setting too high may affect performance
-            n=1,
-            tools=tools,
-            seed=seed,
-        )
+            chat_completion_task = asyncio.create_task(
+                chat_create(
+                    messages=query_messages,  # type: ignore
+                    model=self._effective_model,
+                    temperature=0.0,  # Minimize creativity for search query generation
+                    max_tokens=self.QUERY_RESPONSE_TOKEN_LIMIT,  # Setting too low risks malformed JSON, setting too high may affect performance
+                    n=1,
+                    tools=_TOOLS,
+                    seed=seed,
+                )
+            )
+            # Speculatively embed the original question while the rewrite is in flight; the
+            # rewritten query usually equals the original, so the embedding round-trip hides
+            # behind the LLM call and is discarded only when the rewrite differs
+            if use_vector_search:
+                embed_task = asyncio.create_task(self.compute_text_embedding(original_user_query))
+
+            try:
+                chat_completion: ChatCompletion = await chat_completion_task
+            except Exception:
+                if embed_task:
+                    _discard_task(embed_task)
+                raise
 
-        query_text = self.get_search_query(chat_completion, original_user_query)
+            query_text = self.get_search_query(chat_completion, original_user_query)
 
         # STEP 2: Retrieve relevant documents from the search index with the GPT optimized query
 
         # If retrieval mode includes vectors, compute an embedding for the query
         vectors: list[VectorQuery] = []
-        if use_vector_search:
-            vectors.append(await self.compute_text_embedding(query_text))
+        if embed_task:
+            if query_text == original_user_query:
+                vectors.append(await embed_task)
+            else:
+                # The rewrite usually rephrases the question rather than changing it, so
+                # before paying a fresh embeddings call for the rewritten text, probe the
+                # cache with the speculative embedding (excluding its own just-cached
+                # entry) for a near-duplicate of the question asked
+                similar: Optional[VectorQuery] = None
+                try:
+                    speculative = await embed_task
+                except Exception:
+                    pass  # probe is best-effort; the fresh embedding below still runs
+                else:
+                    similar = await self.embedding_cache.find_similar(
+                        speculative.vector, exclude_text=original_user_query
+                    )
+                if similar is None:
+                    similar = await self.compute_text_embedding(query_text)
+                vectors.append(similar)
 
         results = await self.search(
             top,
@@ -167,7 +372,10 @@ class ChatReadRetrieveReadApproach(ChatApproach):
         )
 
         sources_content = self.get_sources_content(results, use_semantic_captions, use_image_citation=False)
-        content = "\n".join(sources_content)
+        # Overlapping chunks from the same page can render to identical source lines;
+        # dict.fromkeys drops the duplicates while preserving ranking order, so they are
+        # neither tokenized nor billed twice in the prompt
+        sources_content = list(dict.fromkeys(sources_content))
 
         # STEP 3: Generate a contextual and content specific answer using the search results and chat history
 
@@ -177,31 +385,62 @@ class ChatReadRetrieveReadApproach(ChatApproach):
             self.follow_up_questions_prompt_content if overrides.get("suggest_followup_questions") else "",
         )
 
-        response_token_limit = 1024
-        messages = build_messages(
-            model=self.chatgpt_model,
-            system_prompt=system_message,
-            past_messages=messages[:-1],
-            # Model does not handle lengthy system messages well. Moving sources to latest user conversation to solve follow up questions prompt.
-            new_user_content=original_user_query + "\n\nSources:\n" + content,
-            max_tokens=self.chatgpt_token_limit - response_token_limit,
-            fallback_to_default=self.ALLOW_NON_GPT_MODELS,
+        messages = await asyncio.get_running_loop().run_in_executor(
+            _MESSAGE_BUILD_EXECUTOR,
+            functools.partial(
+                build_messages,
+                model=self.chatgpt_model,
+                system_prompt=system_message,
+                past_messages=past_messages,
+                # Model does not handle lengthy system messages well. Moving sources to latest user conversation to solve follow up questions prompt.
+                # Assembled with a single join so the multi-KB source text is materialized once
+                # rather than once for the join and again for the concatenation
+                new_user_content="\n".join([original_user_query, "\nSources:", *sources_content]),
+                max_tokens=self._answer_prompt_budget,
+                fallback_to_default=self.ALLOW_NON_GPT_MODELS,
+            ),
         )
 
+        # A repeat request that builds the exact same completion — same prompt, history,
+        # question, sources and sampling settings — replays the cached answer, skipping
+        # the answer-generation completion entirely (cache-augmented generation)
+        temperature = overrides.get("temperature", 0.3)
+        cache_key = AnswerCache.build_key(messages, self.chatgpt_model, temperature, seed)
+        cached_answer = await self.answer_cache.get(cache_key)
+        if cached_answer is not None:
+            chat_coroutine = asyncio.ensure_future(self._replay_cached_answer(cached_answer, should_stream))
+        else:
+            # Dispatch the final completion before assembling thoughts, so the per-result
+            # dict building below overlaps the request instead of delaying the first token
+            chat_coroutine = asyncio.ensure_future(
+                self._capture_answer(
+                    cache_key,
+                    chat_create(
+                        model=self._effective_model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=self.RESPONSE_TOKEN_LIMIT,
+                        n=1,
+                        stream=should_stream,
+                        seed=seed,
+                    ),
+                    should_stream,
+                )
+            )
+
         data_points = {"text": sources_content}
 
-        extra_info = {
-            "data_points": data_points,
-            "thoughts": [
+        thoughts = []
+        if query_messages is not None:
+            thoughts.append(
                 ThoughtStep(
                     "Prompt to generate search query",
                     query_messages,
-                    (
-                        {"model": self.chatgpt_model, "deployment": self.chatgpt_deployment}
-                        if self.chatgpt_deployment
-                        else {"model": self.chatgpt_model}
-                    ),
-                ),
+                    self._model_info,
+                )
+            )
+        thoughts.extend(
+            [
                 ThoughtStep(
                     "Search using generated search query",
                     query_text,
@@ -216,28 +455,21 @@ class ChatReadRetrieveReadApproach(ChatApproach):
                 ),
                 ThoughtStep(
                     "Search results",
-                    [result.serialize_for_results() for result in results],
+                    # Deferred: only materialized when the response is JSON-encoded
+                    LazyList(lambda: [result.serialize_for_results() for result in results]),
+                    None,
                 ),
                 ThoughtStep(
                     "Prompt to generate answer",
                     messages,
-                    (
-                        {"model": self.chatgpt_model, "deployment": self.chatgpt_deployment}
-                        if self.chatgpt_deployment
-                        else {"model": self.chatgpt_model}
-                    ),
+                    self._model_info,
                 ),
-            ],
+            ]
+        )
+
+        extra_info = {
+            "data_points": data_points,
+            "thoughts": thoughts,
         }
 
-        chat_coroutine = self.openai_client.chat.completions.create(
-            # Azure OpenAI takes the deployment name as the model name
-            model=self.chatgpt_deployment if self.chatgpt_deployment else self.chatgpt_model,
-            messages=messages,
-            temperature=overrides.get("temperature", 0.3),
-            max_tokens=response_token_limit,
-            n=1,
-            stream=should_stream,
-            seed=seed,
-        )
         return (extra_info, chat_coroutine)
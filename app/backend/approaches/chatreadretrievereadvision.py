@@ -67,10 +67,9 @@ class ChatReadRetrieveReadVisionApproach(ChatApproach):
 
     @property
     def system_message_chat_conversation(self):
+        # Static only: injected prompt and follow-up questions prompt are appended
+        # after this prefix by get_system_prompt, never interpolated into it.
         return """
-        
-        {follow_up_questions_prompt}
-        {injected_prompt}
         """
 
     async def run_until_final_call(
@@ -108,7 +107,7 @@ class ChatReadRetrieveReadVisionApproach(ChatApproach):
         query_messages = build_messages(
             model=query_model,
             system_prompt=self.query_prompt_template,
-            few_shots=self.query_prompt_few_shots,
+            few_shots=await self.get_query_prompt_few_shots(original_user_query),
             past_messages=past_messages,
             new_user_content=user_query_request,
             max_tokens=self.chatgpt_token_limit - query_response_token_limit,
@@ -215,6 +214,7 @@ class ChatReadRetrieveReadVisionApproach(ChatApproach):
                 ThoughtStep(
                     "Search results",
                     [result.serialize_for_results() for result in results],
+                    None,
                 ),
                 ThoughtStep(
                     "Prompt to generate answer",
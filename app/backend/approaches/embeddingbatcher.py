@@ -0,0 +1,95 @@
+import asyncio
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from azure.search.documents.models import VectorizedQuery
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent embedding requests into single list-input calls to the
+    embeddings endpoint. Each submit() enqueues its text with a future; a background
+    worker drains the queue, lingering up to window_ms for more texts to arrive (capped
+    at batch_size), then issues one batched call and fans the vectors back out. Under
+    concurrent load this collapses N HTTPS round-trips into ceil(N / batch_size), while
+    a lone request only pays the linger window on top of its own call.
+    """
+
+    def __init__(
+        self,
+        embed_batch: Callable[[List[str]], Awaitable[List[VectorizedQuery]]],
+        window_ms: int = 10,
+        batch_size: int = 16,
+    ):
+        self.embed_batch = embed_batch
+        self.window = window_ms / 1000
+        self.batch_size = batch_size
+        self._queue: asyncio.Queue[Tuple[str, asyncio.Future]] = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+
+    async def submit(self, query_text: str) -> VectorizedQuery:
+        """Returns the vector query for the text, sharing one embeddings call with any
+        other submissions that arrive within the linger window."""
+        # Start the worker lazily so construction does not require a running event loop
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((query_text, future))
+        return await future
+
+    async def close(self) -> None:
+        """Stops the background worker and fails anything still queued, so a shutdown
+        neither leaks the task nor leaves submitters waiting forever. A later submit()
+        simply restarts the worker."""
+        worker, self._worker = self._worker, None
+        if worker is not None and not worker.done():
+            worker.cancel()
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+        closed = RuntimeError("EmbeddingBatcher closed")
+        while not self._queue.empty():
+            self._fail([self._queue.get_nowait()], closed)
+
+    @staticmethod
+    def _fail(batch: List[Tuple[str, asyncio.Future]], exc: Exception) -> None:
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(exc)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                deadline = loop.time() + self.window
+                while len(batch) < self.batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                vector_queries = await self.embed_batch([text for text, _ in batch])
+            except asyncio.CancelledError:
+                # close() stopped the worker mid-batch; fail the collected futures
+                # rather than leaving their submitters waiting forever
+                self._fail(batch, RuntimeError("EmbeddingBatcher closed"))
+                raise
+            except Exception as exc:
+                self._fail(batch, exc)
+                continue
+            if len(vector_queries) != len(batch):
+                # zip() below would silently truncate a short response and leave the
+                # unmatched submitters hanging, so a count mismatch fails the whole batch
+                self._fail(
+                    batch,
+                    RuntimeError(
+                        f"Embeddings call returned {len(vector_queries)} vectors for {len(batch)} inputs"
+                    ),
+                )
+                continue
+            for (_, future), vector_query in zip(batch, vector_queries):
+                if not future.done():
+                    future.set_result(vector_query)
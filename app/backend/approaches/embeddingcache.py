@@ -0,0 +1,118 @@
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from azure.search.documents.models import VectorizedQuery
+
+
+class EmbeddingCache:
+    """
+    In-memory LRU cache of query embeddings, so repeated or near-duplicate questions skip
+    the embeddings round-trip to OpenAI. Exact lookups key on the SHA-256 of the normalized
+    query text; find_similar additionally returns a cached entry whose cosine similarity to
+    a given vector exceeds the threshold, for callers that already hold an embedding.
+
+    Vectors live in a preallocated contiguous matrix (rows compacted with swap-remove
+    on eviction), quantized to int8 with a per-row scale: 4x less memory and bytes
+    scanned per probe than float32, with sub-percent similarity error for normalized
+    embeddings. A probe is one integer matrix-vector product over the live rows.
+    All access is guarded by an asyncio.Lock for coroutine safety.
+    """
+
+    def __init__(self, max_entries: int = 1024, similarity_threshold: float = 0.97):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self._entries: OrderedDict[str, VectorizedQuery] = OrderedDict()
+        self._rows: Dict[str, int] = {}  # key -> row index in the matrix
+        self._keys_by_row: List[str] = []  # row index -> key
+        self._matrix: Optional[np.ndarray] = None  # (max_entries, dim) int8, allocated on first put
+        self._scales: Optional[np.ndarray] = None  # (max_entries,) float32, per-row dequantization scale
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _key(query_text: str) -> str:
+        return hashlib.sha256(query_text.strip().lower().encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _normalize(vector: Sequence[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm > 0 else array
+
+    @staticmethod
+    def _quantize(vector: np.ndarray) -> "tuple[np.ndarray, np.float32]":
+        scale = np.abs(vector).max() / 127.0 or np.float32(1.0)
+        return np.round(vector / scale).astype(np.int8), np.float32(scale)
+
+    async def get(self, query_text: str) -> Optional[VectorizedQuery]:
+        """Returns the cached vector query for an exact (normalized) text match, or None."""
+        key = self._key(query_text)
+        async with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    async def put(self, query_text: str, vector_query: VectorizedQuery) -> None:
+        key = self._key(query_text)
+        async with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+            vector = self._normalize(vector_query.vector)
+            if self._matrix is None:
+                self._matrix = np.empty((self.max_entries, vector.shape[0]), dtype=np.int8)
+                self._scales = np.empty(self.max_entries, dtype=np.float32)
+            if len(self._entries) >= self.max_entries:
+                self._evict_lru()
+            assert self._matrix is not None and self._scales is not None  # allocated above
+            row = len(self._keys_by_row)
+            self._matrix[row], self._scales[row] = self._quantize(vector)
+            self._keys_by_row.append(key)
+            self._rows[key] = row
+            self._entries[key] = vector_query
+
+    def _evict_lru(self) -> None:
+        """Drops the least recently used entry, keeping matrix rows compact by moving the
+        last live row into the freed slot."""
+        assert self._matrix is not None and self._scales is not None  # only called with live entries
+        evicted_key, _ = self._entries.popitem(last=False)
+        row = self._rows.pop(evicted_key)
+        last = len(self._keys_by_row) - 1
+        if row != last:
+            self._matrix[row] = self._matrix[last]
+            self._scales[row] = self._scales[last]
+            moved_key = self._keys_by_row[last]
+            self._keys_by_row[row] = moved_key
+            self._rows[moved_key] = row
+        self._keys_by_row.pop()
+
+    async def find_similar(
+        self, vector: Sequence[float], exclude_text: Optional[str] = None
+    ) -> Optional[VectorizedQuery]:
+        """Returns a cached vector query whose cosine similarity to the given embedding
+        exceeds the threshold, or None. One matrix-vector product over the live rows,
+        accumulated in int32 and rescaled by the per-row and query scales. A caller
+        probing with an embedding whose own text is already cached passes it as
+        exclude_text so the probe cannot trivially match itself."""
+        query = self._normalize(vector)
+        async with self._lock:
+            count = len(self._keys_by_row)
+            if count == 0:
+                return None
+            assert self._matrix is not None and self._scales is not None  # allocated with the first entry
+            query_int8, query_scale = self._quantize(query)
+            int_scores = self._matrix[:count].astype(np.int32) @ query_int8.astype(np.int32)
+            scores = int_scores * (self._scales[:count] * query_scale)
+            if exclude_text is not None:
+                excluded_row = self._rows.get(self._key(exclude_text))
+                if excluded_row is not None:
+                    scores[excluded_row] = -np.inf
+            best = int(np.argmax(scores))
+            if scores[best] < self.similarity_threshold:
+                return None
+            key = self._keys_by_row[best]
+            self._entries.move_to_end(key)
+            return self._entries[key]
@@ -1,4 +1,4 @@
-from typing import Any, Optional
+from typing import Any, Mapping, Optional
 
 from azure.search.documents.aio import SearchClient
 from azure.search.documents.models import VectorQuery
@@ -6,7 +6,7 @@ from openai import AsyncOpenAI
 from openai.types.chat import ChatCompletionMessageParam
 from openai_messages_token_helper import build_messages, get_token_limit
 
-from approaches.approach import Approach, ThoughtStep
+from approaches.approach import EMPTY_CONTEXT, Approach, ThoughtStep
 from core.authentication import AuthenticationHelper
 
 
@@ -72,7 +72,7 @@ info4.pdf: In-network institutions include Overlake, Swedish and others in the r
         self,
         messages: list[ChatCompletionMessageParam],
         session_state: Any = None,
-        context: dict[str, Any] = {},
+        context: Mapping[str, Any] = EMPTY_CONTEXT,
     ) -> dict[str, Any]:
         q = messages[-1]["content"]
         if not isinstance(q, str):
@@ -153,6 +153,7 @@ info4.pdf: In-network institutions include Overlake, Swedish and others in the r
                 ThoughtStep(
                     "Search results",
                     [result.serialize_for_results() for result in results],
+                    None,
                 ),
                 ThoughtStep(
                     "Prompt to generate answer",
@@ -1,4 +1,4 @@
-from typing import Any, Awaitable, Callable, Optional
+from typing import Any, Awaitable, Callable, Mapping, Optional
 
 from azure.search.documents.aio import SearchClient
 from azure.storage.blob.aio import ContainerClient
@@ -10,7 +10,7 @@ from openai.types.chat import (
 )
 from openai_messages_token_helper import build_messages, get_token_limit
 
-from approaches.approach import Approach, ThoughtStep
+from approaches.approach import EMPTY_CONTEXT, Approach, ThoughtStep
 from core.authentication import AuthenticationHelper
 from core.imageshelper import fetch_image
 
@@ -72,7 +72,7 @@ class RetrieveThenReadVisionApproach(Approach):
         self,
         messages: list[ChatCompletionMessageParam],
         session_state: Any = None,
-        context: dict[str, Any] = {},
+        context: Mapping[str, Any] = EMPTY_CONTEXT,
     ) -> dict[str, Any]:
         q = messages[-1]["content"]
         if not isinstance(q, str):
@@ -175,6 +175,7 @@ class RetrieveThenReadVisionApproach(Approach):
                 ThoughtStep(
                     "Search results",
                     [result.serialize_for_results() for result in results],
+                    None,
                 ),
                 ThoughtStep(
                     "Prompt to generate answer",
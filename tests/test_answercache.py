@@ -0,0 +1,158 @@
+import pytest
+from azure.core.credentials import AzureKeyCredential
+from azure.search.documents.aio import SearchClient
+
+import approaches.chatreadretrieveread
+from approaches.answercache import AnswerCache
+from approaches.chatreadretrieveread import ChatReadRetrieveReadApproach
+from core.authentication import AuthenticationHelper
+
+from .mocks import (
+    MOCK_EMBEDDING_DIMENSIONS,
+    MOCK_EMBEDDING_MODEL_NAME,
+    MockAsyncSearchResultsIterator,
+)
+
+
+def answer_messages(
+    question="What is the capital of France?",
+    sources="Benefit_Options-2.pdf: There is a whistleblower policy.",
+    system_prompt="You are a helpful assistant.",
+    past_messages=(),
+):
+    return [
+        {"role": "system", "content": system_prompt},
+        *past_messages,
+        {"role": "user", "content": "\n".join([question, "\nSources:", sources])},
+    ]
+
+
+KEY_ARGS = {
+    "messages": answer_messages(),
+    "model": "gpt-35-turbo",
+    "temperature": 0.3,
+    "seed": None,
+}
+
+
+def test_build_key_is_stable():
+    key = AnswerCache.build_key(**KEY_ARGS)
+    assert key == AnswerCache.build_key(**KEY_ARGS)
+    assert key == AnswerCache.build_key(**{**KEY_ARGS, "messages": answer_messages()})
+
+
+def test_build_key_covers_all_completion_inputs():
+    key = AnswerCache.build_key(**KEY_ARGS)
+    # Two questions can rewrite to the same search query over the same documents, but
+    # the current question is part of the built messages, so the keys differ
+    assert key != AnswerCache.build_key(
+        **{**KEY_ARGS, "messages": answer_messages(question="Name the French capital city")}
+    )
+    # Semantic captions change the sources text without changing the document IDs
+    assert key != AnswerCache.build_key(
+        **{**KEY_ARGS, "messages": answer_messages(sources="Benefit_Options-2.pdf: whistleblower policy.")}
+    )
+    assert key != AnswerCache.build_key(**{**KEY_ARGS, "messages": answer_messages(system_prompt="Answer tersely.")})
+    assert key != AnswerCache.build_key(
+        **{**KEY_ARGS, "messages": answer_messages(past_messages=[{"role": "user", "content": "answer in French"}])}
+    )
+    assert key != AnswerCache.build_key(**{**KEY_ARGS, "model": "gpt-4"})
+    assert key != AnswerCache.build_key(**{**KEY_ARGS, "temperature": 0.0})
+    assert key != AnswerCache.build_key(**{**KEY_ARGS, "seed": 42})
+
+
+@pytest.mark.asyncio
+async def test_get_put_and_lru_eviction():
+    cache = AnswerCache(max_entries=2)
+    await cache.put("key1", "answer1")
+    await cache.put("key2", "answer2")
+    assert await cache.get("key1") == "answer1"
+    # key2 is now least recently used, so the third entry evicts it
+    await cache.put("key3", "answer3")
+    assert await cache.get("key2") is None
+    assert await cache.get("key1") == "answer1"
+    assert await cache.get("key3") == "answer3"
+
+
+async def mock_search(*args, **kwargs):
+    return MockAsyncSearchResultsIterator(kwargs.get("search_text"), kwargs.get("vector_queries"))
+
+
+def fake_build_messages(model, system_prompt, past_messages=[], new_user_content="", **kwargs):
+    return [
+        {"role": "system", "content": system_prompt},
+        *past_messages,
+        {"role": "user", "content": new_user_content},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_skips_second_completion(monkeypatch):
+    from openai.types.chat import ChatCompletion
+    from openai.types.chat.chat_completion import ChatCompletionMessage, Choice
+
+    monkeypatch.setattr(SearchClient, "search", mock_search)
+    # Avoid the tiktoken pass; the prompt content is irrelevant to the caching behavior
+    monkeypatch.setattr(approaches.chatreadretrieveread, "build_messages", fake_build_messages)
+
+    create_calls = []
+
+    async def mock_create(*args, **kwargs):
+        create_calls.append(kwargs)
+        return ChatCompletion(
+            object="chat.completion",
+            choices=[
+                Choice(
+                    message=ChatCompletionMessage(role="assistant", content="Paris [Benefit_Options-2.pdf]."),
+                    finish_reason="stop",
+                    index=0,
+                )
+            ],
+            id="test-123",
+            created=0,
+            model="test-model",
+        )
+
+    chat_approach = ChatReadRetrieveReadApproach(
+        search_client=SearchClient(endpoint="", index_name="", credential=AzureKeyCredential("")),
+        auth_helper=AuthenticationHelper(
+            search_index=None,
+            use_authentication=False,
+            server_app_id=None,
+            server_app_secret=None,
+            client_app_id=None,
+            tenant_id=None,
+        ),
+        openai_client=None,
+        chatgpt_model="gpt-35-turbo",
+        chatgpt_deployment="chat",
+        embedding_deployment="embeddings",
+        embedding_model=MOCK_EMBEDDING_MODEL_NAME,
+        embedding_dimensions=MOCK_EMBEDDING_DIMENSIONS,
+        sourcepage_field="",
+        content_field="",
+        query_language="en-us",
+        query_speller="lexicon",
+    )
+    chat_approach._chat_create = mock_create
+
+    messages = [{"role": "user", "content": "What is the capital of France?"}]
+    overrides = {"retrieval_mode": "text"}
+
+    _, chat_coroutine = await chat_approach.run_until_final_call(messages, overrides, {}, should_stream=False)
+    first_response = await chat_coroutine
+    assert len(create_calls) == 1
+
+    _, chat_coroutine = await chat_approach.run_until_final_call(messages, overrides, {}, should_stream=False)
+    second_response = await chat_coroutine
+    # The answer is replayed from the cache without a second completion call
+    assert len(create_calls) == 1
+    assert second_response.id == "cached-answer"
+    assert second_response.choices[0].message.content == first_response.choices[0].message.content
+
+    # A different temperature is a different key, so the completion runs again
+    _, chat_coroutine = await chat_approach.run_until_final_call(
+        messages, {**overrides, "temperature": 0.0}, {}, should_stream=False
+    )
+    await chat_coroutine
+    assert len(create_calls) == 2
@@ -459,12 +459,73 @@ async def test_chat_text(client, snapshot):
     )
     assert response.status_code == 200
     result = await response.get_json()
-    assert result["context"]["thoughts"][1]["props"]["use_text_search"] is True
-    assert result["context"]["thoughts"][1]["props"]["use_vector_search"] is False
-    assert result["context"]["thoughts"][1]["props"]["use_semantic_ranker"] is False
+    assert result["context"]["thoughts"][0]["props"]["use_text_search"] is True
+    assert result["context"]["thoughts"][0]["props"]["use_vector_search"] is False
+    assert result["context"]["thoughts"][0]["props"]["use_semantic_ranker"] is False
     snapshot.assert_match(json.dumps(result, indent=4), "result.json")
 
 
+@pytest.mark.asyncio
+async def test_chat_single_turn_skips_query_rewrite(client, monkeypatch):
+    chat_client = client.app.config[app.CONFIG_OPENAI_CLIENT]
+    original_create = chat_client.chat.completions.create
+    create_calls = []
+
+    async def counting_create(*args, **kwargs):
+        create_calls.append(kwargs)
+        return await original_create(*args, **kwargs)
+
+    monkeypatch.setattr(chat_client.chat.completions, "create", counting_create)
+
+    response = await client.post(
+        "/chat",
+        json={
+            "messages": [{"content": "What is the capital of France?", "role": "user"}],
+            "context": {
+                "overrides": {"retrieval_mode": "text"},
+            },
+        },
+    )
+    assert response.status_code == 200
+    result = await response.get_json()
+    # A single-turn request searches on the question directly: one completion call
+    # for the answer, no rewrite call and no rewrite-prompt thought step
+    assert len(create_calls) == 1
+    thought_titles = [thought["title"] for thought in result["context"]["thoughts"]]
+    assert "Prompt to generate search query" not in thought_titles
+    assert result["context"]["thoughts"][0]["description"] == "What is the capital of France?"
+
+
+@pytest.mark.asyncio
+async def test_chat_single_turn_force_query_rewrite(client, monkeypatch):
+    chat_client = client.app.config[app.CONFIG_OPENAI_CLIENT]
+    original_create = chat_client.chat.completions.create
+    create_calls = []
+
+    async def counting_create(*args, **kwargs):
+        create_calls.append(kwargs)
+        return await original_create(*args, **kwargs)
+
+    monkeypatch.setattr(chat_client.chat.completions, "create", counting_create)
+
+    response = await client.post(
+        "/chat",
+        json={
+            "messages": [{"content": "What is the capital of France?", "role": "user"}],
+            "context": {
+                "overrides": {"retrieval_mode": "text", "force_query_rewrite": True},
+            },
+        },
+    )
+    assert response.status_code == 200
+    result = await response.get_json()
+    # The override restores the rewrite round-trip even for a single-turn request
+    assert len(create_calls) == 2
+    thought_titles = [thought["title"] for thought in result["context"]["thoughts"]]
+    assert "Prompt to generate search query" in thought_titles
+    assert result["context"]["thoughts"][1]["description"] == "capital of France"
+
+
 @pytest.mark.asyncio
 async def test_chat_text_filter(auth_client, snapshot):
     response = await auth_client.post(
@@ -612,10 +673,10 @@ async def test_chat_hybrid(client, snapshot):
     )
     assert response.status_code == 200
     result = await response.get_json()
-    assert result["context"]["thoughts"][1]["props"]["use_text_search"] is True
-    assert result["context"]["thoughts"][1]["props"]["use_vector_search"] is True
-    assert result["context"]["thoughts"][1]["props"]["use_semantic_ranker"] is False
-    assert result["context"]["thoughts"][1]["props"]["use_semantic_captions"] is False
+    assert result["context"]["thoughts"][0]["props"]["use_text_search"] is True
+    assert result["context"]["thoughts"][0]["props"]["use_vector_search"] is True
+    assert result["context"]["thoughts"][0]["props"]["use_semantic_ranker"] is False
+    assert result["context"]["thoughts"][0]["props"]["use_semantic_captions"] is False
     snapshot.assert_match(json.dumps(result, indent=4), "result.json")
 
 
@@ -632,10 +693,10 @@ async def test_chat_hybrid_semantic_ranker(client, snapshot):
     )
     assert response.status_code == 200
     result = await response.get_json()
-    assert result["context"]["thoughts"][1]["props"]["use_text_search"] is True
-    assert result["context"]["thoughts"][1]["props"]["use_vector_search"] is True
-    assert result["context"]["thoughts"][1]["props"]["use_semantic_ranker"] is True
-    assert result["context"]["thoughts"][1]["props"]["use_semantic_captions"] is False
+    assert result["context"]["thoughts"][0]["props"]["use_text_search"] is True
+    assert result["context"]["thoughts"][0]["props"]["use_vector_search"] is True
+    assert result["context"]["thoughts"][0]["props"]["use_semantic_ranker"] is True
+    assert result["context"]["thoughts"][0]["props"]["use_semantic_captions"] is False
     snapshot.assert_match(json.dumps(result, indent=4), "result.json")
 
 
@@ -652,10 +713,10 @@ async def test_chat_hybrid_semantic_captions(client, snapshot):
     )
     assert response.status_code == 200
     result = await response.get_json()
-    assert result["context"]["thoughts"][1]["props"]["use_text_search"] is True
-    assert result["context"]["thoughts"][1]["props"]["use_vector_search"] is True
-    assert result["context"]["thoughts"][1]["props"]["use_semantic_ranker"] is True
-    assert result["context"]["thoughts"][1]["props"]["use_semantic_captions"] is True
+    assert result["context"]["thoughts"][0]["props"]["use_text_search"] is True
+    assert result["context"]["thoughts"][0]["props"]["use_vector_search"] is True
+    assert result["context"]["thoughts"][0]["props"]["use_semantic_ranker"] is True
+    assert result["context"]["thoughts"][0]["props"]["use_semantic_captions"] is True
     snapshot.assert_match(json.dumps(result, indent=4), "result.json")
 
 
@@ -672,9 +733,9 @@ async def test_chat_vector(client, snapshot):
     )
     assert response.status_code == 200
     result = await response.get_json()
-    assert result["context"]["thoughts"][1]["props"]["use_text_search"] is False
-    assert result["context"]["thoughts"][1]["props"]["use_vector_search"] is True
-    assert result["context"]["thoughts"][1]["props"]["use_semantic_ranker"] is False
+    assert result["context"]["thoughts"][0]["props"]["use_text_search"] is False
+    assert result["context"]["thoughts"][0]["props"]["use_vector_search"] is True
+    assert result["context"]["thoughts"][0]["props"]["use_semantic_ranker"] is False
     snapshot.assert_match(json.dumps(result, indent=4), "result.json")
 
 
@@ -691,9 +752,9 @@ async def test_chat_vector_semantic_ranker(client, snapshot):
     )
     assert response.status_code == 200
     result = await response.get_json()
-    assert result["context"]["thoughts"][1]["props"]["use_text_search"] is False
-    assert result["context"]["thoughts"][1]["props"]["use_vector_search"] is True
-    assert result["context"]["thoughts"][1]["props"]["use_semantic_ranker"] is True
+    assert result["context"]["thoughts"][0]["props"]["use_text_search"] is False
+    assert result["context"]["thoughts"][0]["props"]["use_vector_search"] is True
+    assert result["context"]["thoughts"][0]["props"]["use_semantic_ranker"] is True
     snapshot.assert_match(json.dumps(result, indent=4), "result.json")
 
 
@@ -710,9 +771,9 @@ async def test_chat_text_semantic_ranker(client, snapshot):
     )
     assert response.status_code == 200
     result = await response.get_json()
-    assert result["context"]["thoughts"][1]["props"]["use_text_search"] is True
-    assert result["context"]["thoughts"][1]["props"]["use_vector_search"] is False
-    assert result["context"]["thoughts"][1]["props"]["use_semantic_ranker"] is True
+    assert result["context"]["thoughts"][0]["props"]["use_text_search"] is True
+    assert result["context"]["thoughts"][0]["props"]["use_vector_search"] is False
+    assert result["context"]["thoughts"][0]["props"]["use_semantic_ranker"] is True
     snapshot.assert_match(json.dumps(result, indent=4), "result.json")
 
 
@@ -967,4 +1028,5 @@ async def test_format_as_ndjson():
         yield {"b": "Newlines inside \n strings are fine"}
 
     result = [line async for line in app.format_as_ndjson(gen())]
-    assert result == ['{"a": "I ❤️ 🐍"}\n', '{"b": "Newlines inside \\n strings are fine"}\n']
+    # orjson emits compact separators and unescaped UTF-8
+    assert result == ['{"a":"I ❤️ 🐍"}\n', '{"b":"Newlines inside \\n strings are fine"}\n']
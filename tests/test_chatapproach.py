@@ -1,3 +1,4 @@
+import asyncio
 import json
 
 import pytest
@@ -198,3 +199,26 @@ async def test_search_results_filtering_by_scores(
     assert (
         len(filtered_results) == expected_result_count
     ), f"Expected {expected_result_count} results with minimum_search_score={minimum_search_score} and minimum_reranker_score={minimum_reranker_score}"
+
+
+@pytest.mark.asyncio
+async def test_run_many_preserves_order_and_bounds_concurrency(chat_approach, monkeypatch):
+    active = 0
+    max_active = 0
+
+    async def mock_run(self, messages, session_state=None, context=None):
+        nonlocal active, max_active
+        active += 1
+        max_active = max(max_active, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return {"message": {"content": messages[-1]["content"], "role": "assistant"}}
+
+    monkeypatch.setattr(ChatReadRetrieveReadApproach, "run", mock_run)
+
+    batches = [[{"role": "user", "content": f"question {i}"}] for i in range(5)]
+    results = await chat_approach.run_many(batches, max_concurrency=2)
+
+    # Results come back in batch order regardless of completion order
+    assert [result["message"]["content"] for result in results] == [f"question {i}" for i in range(5)]
+    assert max_active <= 2
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from approaches.embeddingbatcher import EmbeddingBatcher
+
+
+@pytest.mark.asyncio
+async def test_concurrent_submits_coalesce_into_one_call():
+    calls = []
+
+    async def embed_batch(texts):
+        calls.append(list(texts))
+        return [f"vector-{text}" for text in texts]
+
+    batcher = EmbeddingBatcher(embed_batch, window_ms=20, batch_size=16)
+    results = await asyncio.gather(*(batcher.submit(f"q{i}") for i in range(4)))
+    # One batched call, and every submitter gets the vector for its own text
+    assert len(calls) == 1
+    assert sorted(calls[0]) == [f"q{i}" for i in range(4)]
+    assert results == [f"vector-q{i}" for i in range(4)]
+
+
+@pytest.mark.asyncio
+async def test_batch_size_caps_a_single_batch():
+    calls = []
+
+    async def embed_batch(texts):
+        calls.append(list(texts))
+        return [f"vector-{text}" for text in texts]
+
+    batcher = EmbeddingBatcher(embed_batch, window_ms=20, batch_size=2)
+    results = await asyncio.gather(*(batcher.submit(f"q{i}") for i in range(4)))
+    assert all(len(call) <= 2 for call in calls)
+    assert results == [f"vector-q{i}" for i in range(4)]
+
+
+@pytest.mark.asyncio
+async def test_failure_fans_out_to_every_waiter():
+    async def embed_batch(texts):
+        raise RuntimeError("embeddings endpoint down")
+
+    batcher = EmbeddingBatcher(embed_batch, window_ms=5, batch_size=16)
+    results = await asyncio.gather(*(batcher.submit(f"q{i}") for i in range(3)), return_exceptions=True)
+    assert len(results) == 3
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_worker_recovers_after_failure():
+    fail_first = True
+
+    async def embed_batch(texts):
+        nonlocal fail_first
+        if fail_first:
+            fail_first = False
+            raise RuntimeError("transient error")
+        return [f"vector-{text}" for text in texts]
+
+    batcher = EmbeddingBatcher(embed_batch, window_ms=5, batch_size=16)
+    with pytest.raises(RuntimeError):
+        await batcher.submit("q1")
+    assert await batcher.submit("q2") == "vector-q2"
+
+
+@pytest.mark.asyncio
+async def test_short_vector_response_fails_the_batch_instead_of_hanging():
+    async def embed_batch(texts):
+        # One vector short: zip-truncation here would leave a submitter waiting forever
+        return [f"vector-{text}" for text in texts[:-1]]
+
+    batcher = EmbeddingBatcher(embed_batch, window_ms=20, batch_size=16)
+    results = await asyncio.gather(*(batcher.submit(f"q{i}") for i in range(3)), return_exceptions=True)
+    assert len(results) == 3
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_close_stops_the_worker_and_fails_in_flight_submits():
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def embed_batch(texts):
+        started.set()
+        await release.wait()
+        return [f"vector-{text}" for text in texts]
+
+    batcher = EmbeddingBatcher(embed_batch, window_ms=5, batch_size=1)
+    pending = asyncio.ensure_future(batcher.submit("q1"))
+    await started.wait()
+    await batcher.close()
+    with pytest.raises(RuntimeError):
+        await pending
+    # The batcher is reusable after close: the next submit restarts the worker
+    release.set()
+    assert await batcher.submit("q2") == "vector-q2"
@@ -0,0 +1,202 @@
+import pytest
+from azure.core.credentials import AzureKeyCredential
+from azure.search.documents.aio import SearchClient
+from azure.search.documents.models import VectorizedQuery
+
+import approaches.chatreadretrieveread
+from approaches.chatreadretrieveread import ChatReadRetrieveReadApproach
+from approaches.embeddingcache import EmbeddingCache
+from core.authentication import AuthenticationHelper
+
+from .mocks import (
+    MOCK_EMBEDDING_DIMENSIONS,
+    MOCK_EMBEDDING_MODEL_NAME,
+    MockAsyncSearchResultsIterator,
+)
+
+
+def vector_query(vector):
+    return VectorizedQuery(vector=vector, k_nearest_neighbors=50, fields="embedding")
+
+
+@pytest.mark.asyncio
+async def test_exact_hit_normalizes_query_text():
+    cache = EmbeddingCache()
+    await cache.put("What is the capital of France?", vector_query([1.0, 0.0, 0.0]))
+    hit = await cache.get("  what is the capital of france?  ")
+    assert hit is not None
+    assert hit.vector == [1.0, 0.0, 0.0]
+    assert await cache.get("What is the capital of Spain?") is None
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_keeps_matrix_in_sync():
+    cache = EmbeddingCache(max_entries=2)
+    await cache.put("a", vector_query([1.0, 0.0, 0.0]))
+    await cache.put("b", vector_query([0.0, 1.0, 0.0]))
+    # "a" is the least recently used entry, so the third put evicts it
+    await cache.put("c", vector_query([0.0, 0.0, 1.0]))
+    assert await cache.get("a") is None
+    assert await cache.get("b") is not None
+    assert await cache.get("c") is not None
+    # The survivors' matrix rows still score ~1.0 against their own vectors after the
+    # swap-remove compaction, and the evicted vector no longer matches anything
+    assert (await cache.find_similar([0.0, 1.0, 0.0])).vector == [0.0, 1.0, 0.0]
+    assert (await cache.find_similar([0.0, 0.0, 1.0])).vector == [0.0, 0.0, 1.0]
+    assert await cache.find_similar([1.0, 0.0, 0.0]) is None
+
+
+@pytest.mark.asyncio
+async def test_get_refreshes_recency():
+    cache = EmbeddingCache(max_entries=2)
+    await cache.put("a", vector_query([1.0, 0.0, 0.0]))
+    await cache.put("b", vector_query([0.0, 1.0, 0.0]))
+    # Touching "a" makes "b" the eviction candidate
+    await cache.get("a")
+    await cache.put("c", vector_query([0.0, 0.0, 1.0]))
+    assert await cache.get("a") is not None
+    assert await cache.get("b") is None
+
+
+@pytest.mark.asyncio
+async def test_find_similar_respects_threshold():
+    cache = EmbeddingCache(similarity_threshold=0.97)
+    await cache.put("a", vector_query([1.0, 0.0, 0.0]))
+    # Near-duplicate is above the threshold despite the int8 quantization
+    near = await cache.find_similar([0.999, 0.01, 0.0])
+    assert near is not None
+    assert near.vector == [1.0, 0.0, 0.0]
+    # A clearly different vector is not
+    assert await cache.find_similar([0.5, 0.86, 0.0]) is None
+
+
+@pytest.mark.asyncio
+async def test_find_similar_empty_cache():
+    cache = EmbeddingCache()
+    assert await cache.find_similar([1.0, 0.0, 0.0]) is None
+
+
+@pytest.mark.asyncio
+async def test_find_similar_can_exclude_the_probe_text():
+    cache = EmbeddingCache()
+    await cache.put("a", vector_query([1.0, 0.0, 0.0]))
+    # The probe's own entry is skipped, so an otherwise perfect self-match is no hit
+    assert await cache.find_similar([1.0, 0.0, 0.0], exclude_text="a") is None
+    await cache.put("b", vector_query([0.999, 0.01, 0.0]))
+    hit = await cache.find_similar([1.0, 0.0, 0.0], exclude_text="a")
+    assert hit is not None
+    assert hit.vector == [0.999, 0.01, 0.0]
+
+
+def fake_build_messages(model, system_prompt, past_messages=[], new_user_content="", **kwargs):
+    return [
+        {"role": "system", "content": system_prompt},
+        *past_messages,
+        {"role": "user", "content": new_user_content},
+    ]
+
+
+class FakeEmbeddingBatcher:
+    def __init__(self, vectors_by_text):
+        self.vectors_by_text = vectors_by_text
+        self.calls = []
+
+    async def submit(self, text):
+        self.calls.append(text)
+        return vector_query(self.vectors_by_text[text])
+
+
+def build_chat_approach(monkeypatch, captured_vector_queries):
+    from openai.types.chat import ChatCompletion
+    from openai.types.chat.chat_completion import ChatCompletionMessage, Choice
+
+    async def mock_search(*args, **kwargs):
+        captured_vector_queries.append(kwargs.get("vector_queries"))
+        return MockAsyncSearchResultsIterator(kwargs.get("search_text"), kwargs.get("vector_queries"))
+
+    monkeypatch.setattr(SearchClient, "search", mock_search)
+    # Avoid the tiktoken pass; the prompt content is irrelevant to the embedding reuse
+    monkeypatch.setattr(approaches.chatreadretrieveread, "build_messages", fake_build_messages)
+
+    async def mock_create(*args, **kwargs):
+        # The query-rewrite call (the one carrying tools) rephrases the question; the
+        # answer call just needs any completion
+        content = "capital of France" if "tools" in kwargs else "Paris [Benefit_Options-2.pdf]."
+        return ChatCompletion(
+            object="chat.completion",
+            choices=[
+                Choice(
+                    message=ChatCompletionMessage(role="assistant", content=content),
+                    finish_reason="stop",
+                    index=0,
+                )
+            ],
+            id="test-123",
+            created=0,
+            model="test-model",
+        )
+
+    chat_approach = ChatReadRetrieveReadApproach(
+        search_client=SearchClient(endpoint="", index_name="", credential=AzureKeyCredential("")),
+        auth_helper=AuthenticationHelper(
+            search_index=None,
+            use_authentication=False,
+            server_app_id=None,
+            server_app_secret=None,
+            client_app_id=None,
+            tenant_id=None,
+        ),
+        openai_client=None,
+        chatgpt_model="gpt-35-turbo",
+        chatgpt_deployment="chat",
+        embedding_deployment="embeddings",
+        embedding_model=MOCK_EMBEDDING_MODEL_NAME,
+        embedding_dimensions=MOCK_EMBEDDING_DIMENSIONS,
+        sourcepage_field="",
+        content_field="",
+        query_language="en-us",
+        query_speller="lexicon",
+    )
+    chat_approach._chat_create = mock_create
+    return chat_approach
+
+
+QUESTION = "What is the capital of France?"
+
+
+@pytest.mark.asyncio
+async def test_rewrite_probes_cache_with_speculative_embedding(monkeypatch):
+    captured_vector_queries = []
+    chat_approach = build_chat_approach(monkeypatch, captured_vector_queries)
+    batcher = FakeEmbeddingBatcher({QUESTION: [1.0, 0.0, 0.0]})
+    chat_approach.embedding_batcher = batcher
+    # A near-duplicate of the question is already cached from an earlier conversation
+    await chat_approach.embedding_cache.put("french capital city", vector_query([0.999, 0.01, 0.0]))
+
+    messages = [{"role": "user", "content": QUESTION}]
+    overrides = {"retrieval_mode": "vectors", "force_query_rewrite": True}
+    _, chat_coroutine = await chat_approach.run_until_final_call(messages, overrides, {}, should_stream=False)
+    await chat_coroutine
+
+    # Only the speculative embedding of the question was computed; the rewritten query
+    # ("capital of France") was served by the similarity probe, not a second call
+    assert batcher.calls == [QUESTION]
+    assert captured_vector_queries[0][0].vector == [0.999, 0.01, 0.0]
+
+
+@pytest.mark.asyncio
+async def test_rewrite_falls_back_to_fresh_embedding_on_probe_miss(monkeypatch):
+    captured_vector_queries = []
+    chat_approach = build_chat_approach(monkeypatch, captured_vector_queries)
+    batcher = FakeEmbeddingBatcher({QUESTION: [1.0, 0.0, 0.0], "capital of France": [0.9, 0.43, 0.0]})
+    chat_approach.embedding_batcher = batcher
+
+    messages = [{"role": "user", "content": QUESTION}]
+    overrides = {"retrieval_mode": "vectors", "force_query_rewrite": True}
+    _, chat_coroutine = await chat_approach.run_until_final_call(messages, overrides, {}, should_stream=False)
+    await chat_coroutine
+
+    # The probe only sees the question's own just-cached entry (excluded), so the
+    # rewritten query pays a fresh embedding
+    assert batcher.calls == [QUESTION, "capital of France"]
+    assert captured_vector_queries[0][0].vector == [0.9, 0.43, 0.0]
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from approaches.fewshots import FewShotPool, FewShotSelector, build_few_shot_pool
+
+EXAMPLES = [
+    ("Tell me about health plans", "Show available plans"),
+    ("What is the deductible?", "Look up deductibles"),
+    ("How do I enroll?", "Describe enrollment steps"),
+]
+
+# One distinct axis per example, so similarity ranking is unambiguous
+EMBEDDINGS = np.eye(3, dtype=np.float32) * 2.0
+
+
+def test_pool_normalizes_embeddings():
+    pool = FewShotPool.from_examples(EXAMPLES, EMBEDDINGS)
+    assert len(pool) == 3
+    assert np.allclose(np.linalg.norm(pool.embeddings, axis=1), 1.0)
+
+
+def test_pool_rejects_mismatched_lengths():
+    with pytest.raises(ValueError):
+        FewShotPool.from_examples(EXAMPLES, np.eye(2, dtype=np.float32))
+
+
+def test_selector_returns_most_similar_pairs_in_order():
+    selector = FewShotSelector(FewShotPool.from_examples(EXAMPLES, EMBEDDINGS), k=2)
+    messages = selector.select([0.1, 0.9, 0.3])
+    # Top match first, as alternating user/assistant messages
+    assert [message["content"] for message in messages] == [
+        "What is the deductible?",
+        "Look up deductibles",
+        "How do I enroll?",
+        "Describe enrollment steps",
+    ]
+    assert [message["role"] for message in messages] == ["user", "assistant", "user", "assistant"]
+
+
+def test_quantized_selector_matches_float_selection():
+    pool = FewShotPool.from_examples(EXAMPLES, EMBEDDINGS)
+    query = [0.2, 0.1, 0.9]
+    float_selection = FewShotSelector(pool, k=2).select(query)
+    quantized_selection = FewShotSelector(pool, k=2, quantize=True).select(query)
+    assert quantized_selection == float_selection
+
+
+def test_k_is_capped_at_pool_size():
+    selector = FewShotSelector(FewShotPool.from_examples(EXAMPLES, EMBEDDINGS), k=10)
+    assert len(selector.select([1.0, 0.0, 0.0])) == 2 * len(EXAMPLES)
+
+
+@pytest.mark.asyncio
+async def test_build_few_shot_pool_embeds_in_one_call():
+    calls = []
+
+    class MockEmbeddings:
+        async def create(self, *, model, input, **kwargs):
+            calls.append(input)
+            data = [type("MockData", (), {"embedding": row.tolist()})() for row in np.eye(len(input), dtype=np.float32)]
+            return type("MockResponse", (), {"data": data})()
+
+    class MockClient:
+        embeddings = MockEmbeddings()
+
+    pool = await build_few_shot_pool(EXAMPLES, MockClient(), embedding_model="text-embedding-ada-002")
+    assert len(calls) == 1
+    assert calls[0] == [user for user, _ in EXAMPLES]
+    assert len(pool) == len(EXAMPLES)